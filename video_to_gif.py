@@ -1,11 +1,214 @@
 #!/usr/bin/env python3
 import os
+import re
 import sys
 import argparse
+import functools
+import hashlib
+import json
+import shutil
 import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
-def convert_video_to_gif(input_file, output_file=None, width=None, fps=10, quality=90, loop=0, speed=1.0):
+VIDEO_EXTS = ('.mp4', '.avi', '.mov', '.mkv', '.webm', '.flv', '.wmv', '.m4v')
+
+# Set VIDEO_TO_GIF_DEBUG=1 to stream FFmpeg's full log to the terminal
+DEBUG = os.environ.get('VIDEO_TO_GIF_DEBUG') == '1'
+
+# Per-user cache for results that are expensive to recompute between runs
+CACHE_DIR = os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'), 'video_to_gif')
+
+# Most space cached GIFs may take up before the least recently used are removed
+CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+# Environment for FFmpeg processes. Fewer malloc arenas keep the resident size
+# of each FFmpeg small when several run side by side.
+FFMPEG_ENV = dict(os.environ, MALLOC_ARENA_MAX='2')
+
+# Hardware decoders worth handing the input to, if FFmpeg was built with them
+HWACCELS = ('cuda', 'vaapi', 'videotoolbox', 'qsv', 'd3d11va', 'dxva2')
+
+@functools.lru_cache(maxsize=None)
+def _ffmpeg_executable():
+    """Return the absolute path to FFmpeg, or just its name if it isn't on the PATH"""
+    return shutil.which('ffmpeg') or 'ffmpeg'
+
+@functools.lru_cache(maxsize=None)
+def _performance_cores():
+    """Return the performance cores of a hybrid CPU we may run on, or None if all cores are alike"""
+    if not hasattr(os, 'sched_setaffinity'):
+        return None
+    
+    # Linux only exposes a cpu_core PMU (and a cpu_atom one) on hybrid CPUs
+    try:
+        with open('/sys/devices/cpu_core/cpus', 'r') as f:
+            cpulist = f.read().strip()
+    except OSError:
+        return None
+    
+    cores = set()
+    for part in cpulist.split(','):
+        first, _, last = part.partition('-')
+        cores.update(range(int(first), int(last or first) + 1))
+    
+    allowed = os.sched_getaffinity(0)
+    cores &= allowed
+    if not cores or cores == allowed:
+        return None
+    return frozenset(cores)
+
+def _palette_dir():
+    """Return the directory for temporary palettes, preferring the RAM-backed runtime directory"""
+    return os.environ.get('XDG_RUNTIME_DIR') or tempfile.gettempdir()
+
+def _ffmpeg_cpu_count():
+    """Return the number of CPUs FFmpeg will run on"""
+    performance_cores = _performance_cores()
+    if performance_cores is not None:
+        return len(performance_cores)
+    return os.cpu_count() or 1
+
+def _run_ffmpeg(cmd, stdout=subprocess.DEVNULL, stderr=None):
+    """
+    Run an FFmpeg command, raising CalledProcessError if it fails.
+    
+    Python starts the process with posix_spawn() instead of fork()+exec() only
+    when the executable is an absolute path and close_fds, preexec_fn, cwd and
+    start_new_session are left unset, so keep it that way. File descriptors
+    opened by Python are not inheritable, so close_fds=False leaks nothing.
+    """
+    # On hybrid CPUs, keep FFmpeg on the performance cores. The child inherits
+    # the affinity of the calling thread, so pin this thread while it runs.
+    performance_cores = _performance_cores()
+    if performance_cores is None:
+        return subprocess.run(cmd, check=True, stdout=stdout, stderr=stderr, close_fds=False, env=FFMPEG_ENV)
+    
+    previous_cores = os.sched_getaffinity(0)
+    os.sched_setaffinity(0, performance_cores)
+    try:
+        return subprocess.run(cmd, check=True, stdout=stdout, stderr=stderr, close_fds=False, env=FFMPEG_ENV)
+    finally:
+        os.sched_setaffinity(0, previous_cores)
+
+def _run_ffmpeg_job(cmd):
+    """Run an FFmpeg conversion command, keeping only its error messages unless debugging"""
+    # FFmpeg's progress log can grow to megabytes on long videos. Only keep
+    # error messages, which are all we report, unless debugging, in which
+    # case the full log goes straight to the terminal instead of a buffer.
+    if DEBUG:
+        return _run_ffmpeg(cmd)
+    return _run_ffmpeg(cmd[:1] + ['-loglevel', 'error'] + cmd[1:], stderr=subprocess.PIPE)
+
+@functools.lru_cache(maxsize=None)
+def _probe_hwaccels():
+    """Return the hardware decoding methods supported by the installed FFmpeg"""
+    ffmpeg = _ffmpeg_executable()
+    if not os.path.isabs(ffmpeg):
+        return ()
+    
+    # Starting FFmpeg just to list its capabilities costs more than a typical
+    # short conversion's setup, so remember the answer for this exact binary
+    stat = os.stat(ffmpeg)
+    key = f"{ffmpeg}:{stat.st_mtime_ns}:{stat.st_size}"
+    caps_file = os.path.join(CACHE_DIR, 'caps.json')
+    try:
+        with open(caps_file, 'r') as f:
+            caps = json.load(f)
+        if caps.get('ffmpeg') == key:
+            return tuple(caps['hwaccels'])
+    except (OSError, ValueError, KeyError, AttributeError):
+        pass
+    
+    try:
+        result = _run_ffmpeg([ffmpeg, '-hide_banner', '-hwaccels'], stdout=subprocess.PIPE,
+                             stderr=subprocess.DEVNULL)
+    except (OSError, subprocess.CalledProcessError):
+        return ()
+    
+    # The first line is the "Hardware acceleration methods:" header
+    methods = result.stdout.decode(errors='replace').split()
+    hwaccels = tuple(method for method in methods if method in HWACCELS)
+    
+    # Write to a temporary file first so concurrent runs never read a partial cache
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        fd, tmp_file = tempfile.mkstemp(suffix='.tmp', dir=CACHE_DIR)
+        with os.fdopen(fd, 'w') as f:
+            json.dump({'ffmpeg': key, 'hwaccels': hwaccels}, f)
+        os.replace(tmp_file, caps_file)
+    except OSError:
+        pass
+    
+    return hwaccels
+
+# Most videos a shared palette is built from, since each one is a separate
+# input (and decoder) in a single FFmpeg process. Larger batches use a
+# palette per video instead.
+SHARED_PALETTE_MAX_INPUTS = 16
+
+# Filter templates, filled in with % formatting when building the graph
+_FPS_TMPL = 'fps=%s'
+_SPEED_UP_TMPL = 'setpts=PTS/%s'
+_SLOW_DOWN_TMPL = 'setpts=PTS*%s'
+_SCALE_TMPL = 'scale=%d:-1:flags=lanczos'
+_PALETTE_TMPL = (
+    '[0:v]%s,split[s0][s1];'
+    '[s0]palettegen=max_colors=%d:stats_mode=diff[p];'
+    '[s1][p]paletteuse=dither=bayer:bayer_scale=5:diff_mode=rectangle'
+)
+_PALETTEGEN_TMPL = '[0:v]%s,palettegen=max_colors=%d:stats_mode=diff'
+_SHARED_PALETTE_TMPL = (
+    '[0:v]%s[v];'
+    '[v][1:v]paletteuse=dither=bayer:bayer_scale=5:diff_mode=rectangle'
+)
+
+@functools.lru_cache(maxsize=None)
+def _build_filter_graph(width, fps, quality, speed, shared_palette=False, palette_only=False):
+    """
+    Build the FFmpeg filter graph for a conversion.
+    
+    The result is cached, so converting a batch of videos with the same
+    settings builds the graph string once. With palette_only, the graph only
+    runs palettegen, for writing a palette in a separate pass.
+    """
+    # Add filters based on parameters
+    filters = []
+    
+    # Add speed adjustment filter if needed. It must run before fps: fps
+    # numbers its frames in a 1/fps time base, and scaling those integer
+    # timestamps afterwards would truncate them into duplicates.
+    if speed > 1.0:
+        # Speed up: setpts=PTS/speed
+        filters.append(_SPEED_UP_TMPL % speed)
+    elif speed < 1.0:
+        # Slow down: setpts=PTS*(1/speed)
+        filters.append(_SLOW_DOWN_TMPL % (1 / speed))
+    
+    # Add fps filter before scaling, so the scaler only sees frames that end
+    # up in the GIF
+    filters.append(_FPS_TMPL % fps)
+    
+    # Add scale filter if width is specified
+    if width:
+        filters.append(_SCALE_TMPL % width)
+    
+    # Generate the palette and apply it in a single filter graph so the input
+    # is only decoded once. The speed, scale and fps filters run before the
+    # split so palettegen sees exactly the frames that end up in the GIF, and
+    # paletteuse has fewer frames to buffer while the palette is computed.
+    vf_pre = ','.join(filters)
+    if palette_only:
+        return _PALETTEGEN_TMPL % (vf_pre, quality)
+    if shared_palette:
+        # A shared palette is read as a second input, so nothing is buffered
+        return _SHARED_PALETTE_TMPL % vf_pre
+    return _PALETTE_TMPL % (vf_pre, quality)
+
+def convert_video_to_gif(input_file, output_file=None, width=None, fps=10, quality=90, loop=0, speed=1.0,
+                         threads=None, cache=True, palette_file=None, start=None, duration=None,
+                         low_memory=None):
     """
     Convert a video file to a looping GIF using FFmpeg.
     
@@ -17,6 +220,15 @@ def convert_video_to_gif(input_file, output_file=None, width=None, fps=10, quali
         quality (int, optional): Quality of the GIF (1-100)
         loop (int, optional): Loop count (0 = infinite loop)
         speed (float, optional): Speed multiplier (>1 speeds up, <1 slows down)
+        threads (int, optional): Number of threads FFmpeg may use (defaults to all cores)
+        cache (bool, optional): Reuse a GIF previously made from the same video and settings
+        palette_file (str, optional): Palette from generate_shared_palette() to use instead
+            of generating one for this video
+        start (str, optional): Position to start from, in seconds or [HH:]MM:SS[.m]
+        duration (str, optional): Length of video to convert, in seconds or [HH:]MM:SS[.m]
+        low_memory (bool, optional): Generate the palette in a separate pass, decoding the
+            video twice instead of holding all of its frames in memory (defaults to doing so
+            only when no width is given, as full-resolution frames are the costliest to hold)
     
     Returns:
         str: Path to the created GIF
@@ -26,98 +238,295 @@ def convert_video_to_gif(input_file, output_file=None, width=None, fps=10, quali
     
     # If no output file is specified, use the same name with .gif extension
     if output_file is None:
-        output_file = os.path.splitext(input_file)[0] + '.gif'
-    
-    # Build the FFmpeg command
-    cmd = ['ffmpeg', '-i', input_file, '-f', 'gif']
-    
-    # Add filters based on parameters
-    filters = []
-    
-    # Add speed adjustment filter if needed
-    if speed != 1.0:
-        if speed > 1.0:
-            # Speed up: setpts=PTS/speed
-            filters.append(f"setpts=PTS/{speed}")
-        else:
-            # Slow down: setpts=PTS*(1/speed)
-            filters.append(f"setpts=PTS*{1/speed}")
-    
-    # Add scale filter if width is specified
-    if width:
-        filters.append(f"scale={width}:-1:flags=lanczos")
+        output_file = str(Path(input_file).with_suffix('.gif'))
     
-    # Add fps filter
-    filters.append(f"fps={fps}")
+    filter_graph = _build_filter_graph(width, fps, quality, speed, palette_file is not None)
     
-    # Set palatteuse to improve quality
-    palette_file = os.path.splitext(output_file)[0] + "_palette.png"
+    # Identify the GIF by the source file's identity and the exact filter graph,
+    # so a repeated conversion with the same settings is just a file copy
+    if cache:
+        stat = os.stat(input_file)
+        cache_key = hashlib.blake2b(
+            f"{os.path.abspath(input_file)}:{stat.st_mtime_ns}:{stat.st_size}:{filter_graph}:{loop}:{start}:{duration}".encode(),
+            digest_size=8
+        )
+        if palette_file:
+            with open(palette_file, 'rb') as f:
+                cache_key.update(f.read())
+        cached_file = os.path.join(CACHE_DIR, 'gifs', f"{cache_key.hexdigest()}.gif")
+        if os.path.exists(cached_file):
+            # Copy rather than link, so later edits to the output leave the cache alone
+            _unlink_cached_output(output_file)
+            shutil.copyfile(cached_file, output_file)
+            try:
+                os.utime(cached_file)
+            except OSError:
+                pass
+            return output_file
+        
+        # FFmpeg truncates the output in place, which would also overwrite
+        # the cached GIF it may still be linked to
+        _unlink_cached_output(output_file)
     
-    # Generate a palette first for better quality
-    # For palette generation, we need to apply the speed and scale filters, but not the fps filter yet
-    palette_filters = [f for f in filters if not f.startswith("fps=")]
+    # Let FFmpeg use every core for decoding and for the filter graph, where
+    # palettegen and paletteuse spend most of the conversion time, unless the
+    # caller is running several conversions side by side
+    if threads:
+        decode_threads = filter_threads = threads
+    else:
+        decode_threads, filter_threads = 0, _ffmpeg_cpu_count()
     
-    palette_cmd = [
-        'ffmpeg', '-i', input_file
+    input_args = [
+        '-threads', str(decode_threads),
+        '-filter_threads', str(filter_threads),
+        '-filter_complex_threads', str(filter_threads),
     ]
     
-    if palette_filters:
-        palette_cmd.extend(['-vf', ','.join(palette_filters) + f",palettegen=max_colors={quality}"])
-    else:
-        palette_cmd.extend(['-vf', f"palettegen=max_colors={quality}"])
+    # Decode on the GPU when FFmpeg supports it. "auto" falls back to software
+    # decoding when no device is present or the codec isn't supported, and the
+    # decoded frames are copied back to system memory for the CPU-only filters.
+    if _probe_hwaccels():
+        input_args.extend(['-hwaccel', 'auto'])
     
-    palette_cmd.extend(['-y', palette_file])
+    # Seek and limit the input before opening it, so FFmpeg jumps to the
+    # nearest keyframe and stops reading at the end of the range instead of
+    # decoding the whole video
+    if start:
+        input_args.extend(['-ss', str(start)])
+    if duration:
+        input_args.extend(['-t', str(duration)])
     
-    # Then use the palette to create the GIF
-    final_cmd = [
-        'ffmpeg', '-i', input_file, '-i', palette_file
-    ]
+    input_args.extend(['-i', input_file])
     
-    if filters:
-        final_cmd.extend(['-lavfi', f"{','.join(filters)}[x];[x][1:v]paletteuse"])
-    else:
-        final_cmd.extend(['-lavfi', "[0:v][1:v]paletteuse"])
+    def gif_command(palette, graph):
+        gif_cmd = [_ffmpeg_executable(), '-hide_banner'] + input_args
+        if palette:
+            gif_cmd.extend(['-i', palette])
+        gif_cmd.extend([
+            '-filter_complex', graph,
+            '-loop', str(loop), '-y', output_file
+        ])
+        return gif_cmd
     
-    final_cmd.extend(['-loop', str(loop), '-y', output_file])
+    if low_memory is None:
+        low_memory = not width
     
     try:
-        # Create palette
-        subprocess.run(palette_cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        
-        # Create GIF
-        subprocess.run(final_cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        if low_memory and not palette_file:
+            # The single-pass graph holds every filtered frame in memory until
+            # palettegen has seen the whole clip. Write the palette in a pass of
+            # its own instead, which decodes twice but keeps memory use flat.
+            # The palette and GIF are the same, so the cache key still applies.
+            with tempfile.TemporaryDirectory(prefix='video_to_gif_', dir=_palette_dir()) as tmp_dir:
+                own_palette = os.path.join(tmp_dir, 'palette.png')
+                palette_graph = _build_filter_graph(width, fps, quality, speed, palette_only=True)
+                _run_ffmpeg_job([_ffmpeg_executable(), '-hide_banner'] + input_args +
+                                ['-filter_complex', palette_graph, '-y', own_palette])
+                _run_ffmpeg_job(gif_command(own_palette, _build_filter_graph(width, fps, quality, speed, shared_palette=True)))
+        else:
+            _run_ffmpeg_job(gif_command(palette_file, filter_graph))
         
-        # Remove the temporary palette file
-        os.remove(palette_file)
+        if cache:
+            _store_cached_gif(output_file, cached_file)
         
         return output_file
     except subprocess.CalledProcessError as e:
         print(f"Error converting video to GIF: {e.stderr.decode() if e.stderr else str(e)}")
-        if os.path.exists(palette_file):
-            os.remove(palette_file)
         raise
     except Exception as e:
         print(f"Unexpected error: {str(e)}")
-        if os.path.exists(palette_file):
-            os.remove(palette_file)
         raise
 
+def generate_shared_palette(input_files, palette_file, quality=90):
+    """
+    Generate a single palette covering several videos.
+    
+    Only keyframes are decoded, which is enough to sample the colours of each
+    video, and every frame is scaled to the same size so the videos can be
+    concatenated into one palettegen pass regardless of their resolution.
+    Every video is opened at once, so at most SHARED_PALETTE_MAX_INPUTS
+    videos are accepted.
+    
+    Args:
+        input_files (list): Paths to the input video files
+        palette_file (str): Path to write the palette PNG to
+        quality (int, optional): Quality of the palette (1-100)
+    
+    Returns:
+        str: Path to the created palette
+    """
+    if len(input_files) > SHARED_PALETTE_MAX_INPUTS:
+        raise ValueError(f"A shared palette can be built from at most {SHARED_PALETTE_MAX_INPUTS} videos")
+    
+    palette_cmd = [_ffmpeg_executable(), '-hide_banner']
+    streams = []
+    for i, input_file in enumerate(input_files):
+        palette_cmd.extend(['-skip_frame', 'nokey', '-i', input_file])
+        streams.append(f"[{i}:v]scale=256:256,setsar=1[v{i}];")
+    
+    labels = ''.join(f"[v{i}]" for i in range(len(input_files)))
+    filter_graph = (
+        ''.join(streams) +
+        f"{labels}concat=n={len(input_files)}:v=1:a=0,palettegen=max_colors={quality}:stats_mode=diff"
+    )
+    palette_cmd.extend(['-filter_complex', filter_graph, '-y', palette_file])
+    
+    _run_ffmpeg_job(palette_cmd)
+    return palette_file
+
+def _unlink_cached_output(output_file):
+    """Remove an output GIF that shares its file with a cache entry, so it can be rewritten safely"""
+    try:
+        if os.stat(output_file).st_nlink > 1:
+            os.unlink(output_file)
+    except OSError:
+        pass
+
+def _store_cached_gif(gif_file, cached_file):
+    """Add a finished GIF to the cache, ignoring failures since the cache is optional"""
+    try:
+        os.makedirs(os.path.dirname(cached_file), exist_ok=True)
+        try:
+            # A hard link costs no extra space while the output exists. If
+            # the entry is already there, it was made with the same settings.
+            os.link(gif_file, cached_file)
+        except FileExistsError:
+            pass
+        except OSError:
+            # Different file systems, or no hard links, so fall back to a copy
+            fd, tmp_file = tempfile.mkstemp(suffix='.tmp', dir=os.path.dirname(cached_file))
+            os.close(fd)
+            shutil.copyfile(gif_file, tmp_file)
+            os.replace(tmp_file, cached_file)
+        _prune_cache(os.path.dirname(cached_file))
+    except OSError:
+        pass
+
+def _prune_cache(cache_dir):
+    """Remove the least recently used cached GIFs until they fit in CACHE_MAX_BYTES"""
+    entries = []
+    with os.scandir(cache_dir) as it:
+        for entry in it:
+            if entry.name.endswith('.gif') and entry.is_file():
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+    
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= CACHE_MAX_BYTES:
+            break
+        try:
+            os.unlink(path)
+            total -= size
+        except OSError:
+            pass
+
+def convert_videos(jobs, width=None, fps=10, quality=90, loop=0, speed=1.0, max_workers=None, cache=True,
+                   palette_file=None, start=None, duration=None, low_memory=None):
+    """
+    Convert several videos to GIFs concurrently, printing progress as each one finishes.
+    
+    Args:
+        jobs (list): (input_file, output_file) pairs, output_file may be None
+        width (int, optional): Width to resize the GIFs to (aspect ratio is maintained)
+        fps (int, optional): Frames per second for the GIFs
+        quality (int, optional): Quality of the GIFs (1-100)
+        loop (int, optional): Loop count (0 = infinite loop)
+        speed (float, optional): Speed multiplier (>1 speeds up, <1 slows down)
+        max_workers (int, optional): Number of conversions to run at once
+        cache (bool, optional): Reuse GIFs previously made from the same videos and settings
+        palette_file (str, optional): Palette shared by all the GIFs
+        start (str, optional): Position to start each video from
+        duration (str, optional): Length of each video to convert
+        low_memory (bool, optional): Generate each palette in a separate pass to save memory
+            (defaults to doing so only when no width is given)
+    
+    Returns:
+        int: Number of videos converted successfully
+    """
+    # The jobs run at the same time, so two of them writing the same GIF would
+    # corrupt it. Keep the first job for each output file and skip the rest.
+    unique_jobs = []
+    output_owners = {}
+    for input_file, output_file in jobs:
+        if output_file is None:
+            output_file = str(Path(input_file).with_suffix('.gif'))
+        output_key = os.path.normcase(os.path.abspath(output_file))
+        if output_key in output_owners:
+            print(f"Skipping {input_file}: {output_file} is already being created from {output_owners[output_key]}")
+            continue
+        output_owners[output_key] = input_file
+        unique_jobs.append((input_file, output_file))
+    jobs = unique_jobs
+    
+    if not jobs:
+        return 0
+    
+    # Run a few FFmpeg processes side by side and split the cores between them
+    # so their single-threaded phases overlap without oversubscribing the CPU.
+    # Each worker only waits on its FFmpeg process, so threads are enough and
+    # the next FFmpeg starts as soon as a slot frees up, without the cost of
+    # starting worker interpreters.
+    cpu_count = _ffmpeg_cpu_count()
+    if max_workers is None:
+        max_workers = max(1, cpu_count // 4)
+    max_workers = min(max_workers, len(jobs))
+    threads = max(1, cpu_count // max_workers)
+    
+    success_count = 0
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(convert_video_to_gif, input_file, output_file, width, fps, quality, loop, speed,
+                            threads=threads, cache=cache, palette_file=palette_file,
+                            start=start, duration=duration, low_memory=low_memory): input_file
+            for input_file, output_file in jobs
+        }
+        
+        try:
+            for done_count, future in enumerate(as_completed(futures), 1):
+                input_file = futures[future]
+                
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"\n[{done_count}/{len(jobs)}] Failed: {os.path.basename(input_file)}")
+                    print(f"Error processing {input_file}: {str(e)}")
+                else:
+                    print(f"\n[{done_count}/{len(jobs)}] Converted: {os.path.basename(input_file)}")
+                    print(f"Successfully created: {result}")
+                    success_count += 1
+        except KeyboardInterrupt:
+            # Drop the queued conversions, otherwise leaving the executor
+            # would start every one of them before Ctrl-C takes effect
+            for future in futures:
+                future.cancel()
+            raise
+    
+    return success_count
+
 def get_video_files(directory, recursive=False):
     """Get all video files in a directory"""
-    video_extensions = ['.mp4', '.avi', '.mov', '.mkv', '.webm', '.flv', '.wmv', '.m4v']
     video_files = []
     
-    if recursive:
-        for root, _, files in os.walk(directory):
-            for file in files:
-                file_path = os.path.join(root, file)
-                if os.path.splitext(file_path)[1].lower() in video_extensions:
-                    video_files.append(file_path)
-    else:
-        for file in os.listdir(directory):
-            file_path = os.path.join(directory, file)
-            if os.path.isfile(file_path) and os.path.splitext(file_path)[1].lower() in video_extensions:
-                video_files.append(file_path)
+    # scandir reuses the file type from the directory listing, so only
+    # symlinks need an extra stat() call
+    pending = [directory]
+    while pending:
+        path = pending.pop()
+        try:
+            entries = os.scandir(path)
+        except OSError:
+            # Like os.walk, skip subdirectories that can't be read
+            if path == directory:
+                raise
+            continue
+        
+        with entries:
+            for entry in entries:
+                if recursive and entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+                elif entry.name.lower().endswith(VIDEO_EXTS) and entry.is_file():
+                    video_files.append(entry.path)
     
     return video_files
 
@@ -168,21 +577,29 @@ def interactive_mode():
                 print(f"{i}. {os.path.basename(video)}")
             
             # Get user selection
-            selection = input("\nEnter video numbers to convert (comma-separated, e.g., 1,3,5) or 'all': ")
+            selection = input("\nEnter video numbers to convert (comma-separated, ranges allowed, e.g., 1,3,5-8) or 'all': ")
             
             if selection.lower() == 'all':
                 input_files = all_videos
             else:
-                try:
-                    selected_indices = [int(idx.strip()) - 1 for idx in selection.split(',')]
-                    input_files = [all_videos[idx] for idx in selected_indices if 0 <= idx < len(all_videos)]
-                    
-                    if not input_files:
-                        print("No valid files selected.")
-                        return 1
-                except (ValueError, IndexError):
+                # Pick out numbers and ranges in one pass, whatever separates them
+                selected_ranges = re.findall(r'(\d+)(?:\s*-\s*(\d+))?', selection)
+                if not selected_ranges:
                     print("Invalid selection.")
                     return 1
+                
+                # Clamp each range to the listed videos before expanding it
+                selected_indices = []
+                for first, last in selected_ranges:
+                    selected_indices.extend(range(int(first) - 1, min(int(last or first), len(all_videos))))
+                
+                # Keep the order entered, but convert each video only once
+                selected_indices = dict.fromkeys(selected_indices)
+                input_files = [all_videos[idx] for idx in selected_indices if 0 <= idx < len(all_videos)]
+                
+                if not input_files:
+                    print("No valid files selected.")
+                    return 1
     
     # Get output directory
     output_choice = input("Convert to the same directory as the original files? (y/n): ").lower()
@@ -213,6 +630,17 @@ def interactive_mode():
         speed = float(speed_input) if speed_input.strip() else 1.0
         
         loop = input("Enable infinite looping? (y/n): ").lower() != 'n'
+        
+        low_memory_input = input("Save memory by decoding each video twice? (y/n, press Enter to do so only at original size): ").lower()
+        low_memory = {'y': True, 'n': False}.get(low_memory_input.strip())
+        
+        # A whole directory can share one palette built from every video's
+        # keyframes, as long as it is small enough to open in one FFmpeg
+        shared_palette = False
+        if input_type == "2" and 1 < len(input_files) <= SHARED_PALETTE_MAX_INPUTS:
+            shared_palette = input("Use one shared palette for all videos? Faster, but colours may be less accurate (y/n): ").lower() != 'n'
+        
+        cache = input("Reuse GIFs made earlier with the same settings? (y/n): ").lower() != 'n'
     except ValueError:
         print("Invalid input. Please enter valid numbers.")
         return 1
@@ -225,40 +653,41 @@ def interactive_mode():
         print(f"- Quality: {quality}")
         print(f"- Speed: {speed}x")
         print(f"- Looping: {'Enabled' if loop else 'Disabled'}")
+        print(f"- Low memory: {'Auto' if low_memory is None else 'Enabled' if low_memory else 'Disabled'}")
+        print(f"- Shared palette: {'Enabled' if shared_palette else 'Disabled'}")
+        print(f"- Cache: {'Enabled' if cache else 'Disabled'}")
         
         proceed = input("\nProceed with conversion? (y/n): ").lower()
         if proceed != 'y':
             print("Operation cancelled.")
             return 0
     
-    # Convert each selected video
+    # Convert the selected videos
     print("\nStarting conversion...")
-    success_count = 0
     
-    for i, input_file in enumerate(input_files, 1):
-        print(f"\n[{i}/{len(input_files)}] Converting: {os.path.basename(input_file)}")
+    jobs = []
+    for input_file in input_files:
+        if output_dir:
+            output_file = str(Path(output_dir) / Path(input_file).with_suffix('.gif').name)
+        else:
+            output_file = None
+        jobs.append((input_file, output_file))
+    
+    # When converting a whole directory, build one palette from all the videos
+    # and share it if asked to, instead of running palettegen for every video. The palette
+    # lives in the per-user runtime directory (usually RAM-backed) rather than
+    # on the output drive, and is removed when the conversions are done.
+    with tempfile.TemporaryDirectory(prefix='video_to_gif_', dir=_palette_dir()) as tmp_dir:
+        palette_file = None
+        if shared_palette:
+            try:
+                palette_file = generate_shared_palette(input_files, os.path.join(tmp_dir, 'palette.png'), quality)
+            except (OSError, subprocess.CalledProcessError) as e:
+                print(f"Could not generate a shared palette, using one per video: "
+                      f"{e.stderr.decode() if getattr(e, 'stderr', None) else str(e)}")
         
-        try:
-            if output_dir:
-                output_file = os.path.join(output_dir, os.path.basename(os.path.splitext(input_file)[0]) + '.gif')
-            else:
-                output_file = None
-            
-            result = convert_video_to_gif(
-                input_file,
-                output_file,
-                width,
-                fps,
-                quality,
-                0 if loop else 1,
-                speed
-            )
-            
-            print(f"Successfully created: {result}")
-            success_count += 1
-            
-        except Exception as e:
-            print(f"Error processing {input_file}: {str(e)}")
+        success_count = convert_videos(jobs, width, fps, quality, 0 if loop else 1, speed,
+                                       cache=cache, palette_file=palette_file, low_memory=low_memory)
     
     # Show summary
     print(f"\nConversion complete: {success_count} of {len(input_files)} videos converted successfully.")
@@ -279,6 +708,11 @@ def main():
         parser.add_argument("-i", "--interactive", action="store_true", help="Run in interactive mode")
         parser.add_argument("-b", "--batch", help="Use a batch file containing a list of videos to convert, one per line")
         parser.add_argument("-s", "--speed", type=float, default=1.0, help="Speed multiplier (>1 speeds up, <1 slows down, default: 1.0)")
+        parser.add_argument("--start", help="Start converting from this position (seconds or HH:MM:SS)")
+        parser.add_argument("--duration", help="Only convert this much of the video (seconds or HH:MM:SS)")
+        parser.add_argument("--low-memory", dest="low_memory", action="store_const", const=True, default=None, help="Generate the palette in a separate pass, using less memory on long or large videos at the cost of decoding them twice (default when no width is given)")
+        parser.add_argument("--single-pass", dest="low_memory", action="store_const", const=False, help="Generate and apply the palette in one pass, even without a width")
+        parser.add_argument("--no-cache", action="store_true", help="Always reconvert instead of reusing GIFs made earlier with the same settings")
         
         args = parser.parse_args()
         
@@ -296,39 +730,34 @@ def main():
             with open(args.batch, 'r') as f:
                 input_files = [line.strip() for line in f if line.strip() and not line.strip().startswith('#')]
             
-            # Process each file in the batch
-            success_count = 0
+            # Collect the files in the batch
+            jobs = []
             for i, input_file in enumerate(input_files, 1):
-                print(f"\n[{i}/{len(input_files)}] Processing: {input_file}")
-                
                 if not os.path.exists(input_file):
                     print(f"Error: File not found: {input_file}")
                     continue
                 
-                try:
-                    output_file = None
-                    if args.output:
-                        if os.path.isdir(args.output):
-                            output_file = os.path.join(args.output, os.path.basename(os.path.splitext(input_file)[0]) + '.gif')
-                        else:
-                            # For single file output, only use the specified output for the first file
-                            output_file = args.output if i == 1 else None
-                    
-                    result = convert_video_to_gif(
-                        input_file,
-                        output_file,
-                        args.width,
-                        args.fps,
-                        args.quality,
-                        1 if args.no_loop else 0,
-                        args.speed
-                    )
-                    
-                    print(f"Successfully created: {result}")
-                    success_count += 1
-                    
-                except Exception as e:
-                    print(f"Error processing {input_file}: {str(e)}")
+                output_file = None
+                if args.output:
+                    if os.path.isdir(args.output):
+                        output_file = str(Path(args.output) / Path(input_file).with_suffix('.gif').name)
+                    else:
+                        # For single file output, only use the specified output for the first file
+                        output_file = args.output if i == 1 else None
+                jobs.append((input_file, output_file))
+            
+            success_count = convert_videos(
+                jobs,
+                args.width,
+                args.fps,
+                args.quality,
+                1 if args.no_loop else 0,
+                args.speed,
+                cache=not args.no_cache,
+                start=args.start,
+                duration=args.duration,
+                low_memory=args.low_memory
+            )
             
             # Show summary
             print(f"\nBatch processing complete: {success_count} of {len(input_files)} videos converted successfully.")
@@ -354,7 +783,11 @@ def main():
                     args.fps, 
                     args.quality,
                     loop_value,
-                    args.speed
+                    args.speed,
+                    cache=not args.no_cache,
+                    start=args.start,
+                    duration=args.duration,
+                    low_memory=args.low_memory
                 )
                 print(f"Successfully created: {result}")
             except Exception as e:
@@ -366,52 +799,27 @@ def main():
             if args.output and not os.path.isdir(args.output):
                 os.makedirs(args.output, exist_ok=True)
             
-            # Get video file extensions
-            video_extensions = ['.mp4', '.avi', '.mov', '.mkv', '.webm', '.flv', '.wmv', '.m4v']
+            # Collect the video files, walking the directory structure if recursive
+            jobs = []
+            for video_file in get_video_files(str(input_path), args.recursive):
+                file_path = Path(video_file)
+                output_dir = Path(args.output) if args.output else file_path.parent
+                output_file = output_dir / file_path.with_suffix('.gif').name
+                jobs.append((str(file_path), str(output_file)))
             
-            # Function to process a single file within directory processing
-            def process_file(file_path):
-                if file_path.suffix.lower() in video_extensions:
-                    output_dir = Path(args.output) if args.output else file_path.parent
-                    output_file = output_dir / (file_path.stem + '.gif')
-                    
-                    try:
-                        result = convert_video_to_gif(
-                            str(file_path), 
-                            str(output_file), 
-                            args.width, 
-                            args.fps, 
-                            args.quality,
-                            loop_value,
-                            args.speed
-                        )
-                        print(f"Successfully created: {result}")
-                        return True
-                    except Exception as e:
-                        print(f"Error processing {file_path}: {str(e)}")
-                        return False
-                return False
-            
-            # Walk through the directory structure if recursive
-            processed_count = 0
-            success_count = 0
-            
-            if args.recursive:
-                for root, _, files in os.walk(input_path):
-                    root_path = Path(root)
-                    for file in files:
-                        file_path = root_path / file
-                        if file_path.suffix.lower() in video_extensions:
-                            processed_count += 1
-                            if process_file(file_path):
-                                success_count += 1
-            else:
-                # Process only files in the top-level directory
-                for file_path in input_path.iterdir():
-                    if file_path.is_file() and file_path.suffix.lower() in video_extensions:
-                        processed_count += 1
-                        if process_file(file_path):
-                            success_count += 1
+            processed_count = len(jobs)
+            success_count = convert_videos(
+                jobs,
+                args.width,
+                args.fps,
+                args.quality,
+                loop_value,
+                args.speed,
+                cache=not args.no_cache,
+                start=args.start,
+                duration=args.duration,
+                low_memory=args.low_memory
+            )
             
             print(f"\nDirectory processing complete: {success_count} of {processed_count} videos converted successfully.")
     else: